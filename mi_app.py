@@ -1,6 +1,10 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from streamlit_autorefresh import st_autorefresh
 from datetime import date, timedelta
 
 # --- Configuración de la Página de Streamlit ---
@@ -12,34 +16,71 @@ st.set_page_config(
 
 # --- Auto-Refresco de la Página ---
 refresh_interval_seconds = 1200  # 20 minutos
-st.markdown(
-    f"<script>setTimeout(function(){{window.location.reload();}}, {refresh_interval_seconds * 1000});</script>",
-    unsafe_allow_html=True,
-)
+# Re-ejecuta el script sin recargar la página ni volver a bajar los recursos del front-end
+st_autorefresh(interval=refresh_interval_seconds * 1000, key='auto_refresco')
 
 # --- Título y Descripción ---
 st.title("💵 Comparador Interactivo de Dólares en Argentina")
 st.markdown("Visualiza y compara las cotizaciones históricas, la brecha cambiaria y las variaciones diarias del dólar. **La página se actualiza cada 20 minutos.**")
 
+# --- Sesión HTTP Compartida ---
+@st.cache_resource
+def obtener_sesion_http():
+    """Devuelve una sesión HTTP reutilizable (keep-alive) compartida entre re-ejecuciones."""
+    sesion = requests.Session()
+    sesion.headers.update({"User-Agent": "app-dolar-argentina"})
+    sesion.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return sesion
+
 # --- Carga y Procesamiento de Datos ---
-@st.cache_data(ttl=refresh_interval_seconds)
+def calcular_brecha(datos_dolar):
+    """Calcula la brecha porcentual de cada cotización contra el dólar oficial."""
+    dolares_para_brecha = [col for col in datos_dolar.columns if col != 'Oficial']
+    return (datos_dolar[dolares_para_brecha].div(datos_dolar['Oficial'], axis=0) - 1) * 100
+
+def calcular_variaciones_diarias(datos_dolar):
+    """Calcula la variación diaria porcentual en un índice continuo de días (0 si no hubo cotización)."""
+    df_variaciones = (datos_dolar.pct_change() * 100).fillna(0)
+    dias = pd.date_range(df_variaciones.index.min(), df_variaciones.index.max(), freq='D', name=df_variaciones.index.name)
+    return df_variaciones.reindex(dias, fill_value=0)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def procesar_cotizaciones(contenido):
+    """Convierte el JSON crudo de la API en las cotizaciones (una columna por casa), su brecha y sus variaciones diarias."""
+    data = orjson.loads(contenido)
+    # Construcción por columnas: evita inferir tipos registro por registro
+    df = pd.DataFrame({
+        'fecha': [d['fecha'] for d in data],
+        'casa': [d['casa'] for d in data],
+        'venta': np.array([d['venta'] for d in data], dtype='float64'),
+    })
+
+    df['fecha'] = pd.to_datetime(df['fecha'], format='ISO8601', cache=True)
+    # Se capitaliza antes de categorizar para unificar variantes como 'blue' y 'Blue'
+    df['casa'] = df['casa'].str.capitalize().astype('category')
+    # (fecha, casa) es única en la API: 'pivot' evita la agregación de 'pivot_table'
+    df = df.dropna(subset=['venta']).drop_duplicates(['fecha', 'casa'], keep='last')
+    # Sin categorías vacías, 'pivot' devuelve las columnas en orden alfabético
+    df['casa'] = df['casa'].cat.remove_unused_categories()
+    df_pivote = df.pivot(index='fecha', columns='casa', values='venta')
+    df_pivote.columns = df_pivote.columns.astype(str)
+    
+    if 'Oficial' not in df_pivote.columns:
+        return None
+        
+    df_pivote = df_pivote.sort_index()
+    # Los cálculos derivados viajan con las cotizaciones en la misma entrada de caché
+    return df_pivote, calcular_brecha(df_pivote), calcular_variaciones_diarias(df_pivote)
+
+@st.cache_data(ttl=refresh_interval_seconds, show_spinner=False)
 def cargar_y_procesar_datos():
-    """Carga y procesa los datos de la API en un DataFrame de Pandas."""
+    """Carga y procesa los datos de la API; devuelve (cotizaciones, brecha, variaciones diarias) o None."""
     url = 'https://api.argentinadatos.com/v1/cotizaciones/dolares'
     try:
-        response = requests.get(url)
+        response = obtener_sesion_http().get(url, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        df = pd.DataFrame(data)
-
-        df['fecha'] = pd.to_datetime(df['fecha'])
-        df_pivote = df.pivot_table(index='fecha', columns='casa', values='venta')
-        df_pivote.columns = [str(col).capitalize() for col in df_pivote.columns]
-        
-        if 'Oficial' not in df_pivote.columns:
-            return None
-            
-        return df_pivote.sort_index()
+        # Si la API devuelve los mismos bytes que antes, se reutilizan los datos ya procesados
+        return procesar_cotizaciones(response.content)
 
     except Exception as e:
         st.error(f"Error al cargar o procesar los datos: {e}")
@@ -47,7 +88,9 @@ def cargar_y_procesar_datos():
 
 # --- Cuerpo Principal de la Aplicación ---
 with st.spinner('Cargando datos históricos desde la API...'):
-    datos_dolar = cargar_y_procesar_datos()
+    datos = cargar_y_procesar_datos()
+
+datos_dolar, df_brecha, df_variaciones_continuas = datos if datos is not None else (None, None, None)
 
 if datos_dolar is not None and not datos_dolar.empty:
     st.success(f"¡Datos cargados y procesados! Próxima actualización en 20 minutos.")
@@ -65,8 +108,7 @@ if datos_dolar is not None and not datos_dolar.empty:
     st.header("📊 Brecha Cambiaria vs. Dólar Oficial (%)")
     dolares_para_brecha = [col for col in opciones_disponibles if col != 'Oficial']
     if dolares_para_brecha:
-        df_brecha = (datos_dolar[dolares_para_brecha].div(datos_dolar['Oficial'], axis=0) - 1) * 100
-        opciones_brecha_default = [opt for opt in ['Blue', 'Mep', 'Ccl'] if opt in df_brecha.columns]
+        opciones_brecha_default = [opt for opt in opciones_default if opt != 'Oficial']
         brecha_seleccionada = st.multiselect("Selecciona las brechas a visualizar:", options=dolares_para_brecha, default=opciones_brecha_default)
         if brecha_seleccionada:
             st.line_chart(df_brecha[brecha_seleccionada])
@@ -75,9 +117,6 @@ if datos_dolar is not None and not datos_dolar.empty:
     st.header("📉 Variación Diaria Porcentual (%)")
     st.markdown("Usa los filtros para explorar la volatilidad en un período específico de todo el historial.")
     
-    df_variaciones = datos_dolar.pct_change() * 100
-    df_variaciones_continuas = df_variaciones.resample('D').asfreq().fillna(0)
-    
     variaciones_seleccionadas = st.multiselect(
         'Selecciona las cotizaciones para el análisis de volatilidad:',
         options=opciones_disponibles, default=opciones_default, key='variaciones_multiselect'
@@ -94,16 +133,18 @@ if datos_dolar is not None and not datos_dolar.empty:
         fecha_fin = st.date_input("Hasta:", value=fecha_maxima, min_value=fecha_minima, max_value=fecha_maxima, key='var_end_date')
 
     if variaciones_seleccionadas and fecha_inicio <= fecha_fin:
-        df_filtrado = df_variaciones_continuas[variaciones_seleccionadas][fecha_inicio:fecha_fin]
+        df_filtrado = df_variaciones_continuas.loc[pd.Timestamp(fecha_inicio):pd.Timestamp(fecha_fin), variaciones_seleccionadas]
         st.bar_chart(df_filtrado)
     else:
         st.warning("Por favor, selecciona al menos una cotización y asegúrate de que el rango de fechas sea válido.")
 
     # --- SECCIÓN 4: Tabla de Datos ---
     with st.expander("Ver Tabla con los Últimos Datos"):
-        df_tabla = datos_dolar.sort_index(ascending=False).head(20).round(2)
+        df_tabla = datos_dolar.iloc[-20:][::-1]
         df_tabla.index = df_tabla.index.strftime('%Y-%m-%d')
-        st.dataframe(df_tabla, use_container_width=True)
+        # El redondeo a 2 decimales lo aplica el navegador, no pandas
+        formato_columnas = {col: st.column_config.NumberColumn(format="%.2f") for col in df_tabla.columns}
+        st.dataframe(df_tabla, column_config=formato_columnas, use_container_width=True)
         
     # --- INICIO: PIE DE PÁGINA CON CRÉDITOS ---
     st.markdown("---")  # Una línea horizontal para separar